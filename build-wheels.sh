@@ -13,16 +13,14 @@ export PATH=/root/.cargo/bin:$PATH
 
 mkdir -p build && rm -rf build/*
 
-for PYBIN in /opt/python/{cp36-cp36m,cp37-cp37m,cp38-cp38,cp39-cp39}/bin; do
+for PYBIN in /opt/python/{cp37-cp37m,cp38-cp38,cp39-cp39}/bin; do
 	export PYTHON_SYS_EXECUTABLE="$PYBIN/python"
 
 	"${PYBIN}/python" -m ensurepip
 	# Note: please change both here and in the makefile if specifying a particular
-	# version or removing the version pin.
-	"${PYBIN}/python" -m pip install -U setuptools wheel setuptools-rust==0.10.6
-	"${PYBIN}/python" setup.py bdist_wheel
-done
-
-for whl in dist/*.whl; do
-	auditwheel repair "$whl" -w dist/
+	# version of maturin.
+	"${PYBIN}/python" -m pip install -U "maturin>=1.5,<2.0"
+	# maturin checks and tags the wheel for the container's manylinux policy,
+	# so there is no need for a separate auditwheel step.
+	"${PYBIN}/python" -m maturin build --release --out dist --interpreter "${PYBIN}/python"
 done
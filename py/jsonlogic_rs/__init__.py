@@ -2,36 +2,192 @@
 
 __all__ = (
     "apply",
+    "apply_batch",
+    "apply_bytes",
+    "apply_many",
     "apply_serialized",
 )
 
-import json as _json
-import sys as _sys
+import functools as _functools
 
 try:
-    from .jsonlogic import apply as _apply
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    from . import jsonlogic as _jsonlogic
 except ImportError:
     # See https://docs.python.org/3/library/os.html#os.add_dll_directory
-    # for why this is here.
-    if _sys.platform.startswith("win"):
-        import os
-        from pathlib import Path
-        if hasattr(os, "add_dll_directory"):
-            os.add_dll_directory(str(Path(__file__).parent))
-        from .jsonlogic import apply as _apply
-    else:
+    # for why this is here. Only pay for these imports if the plain import
+    # failed.
+    import os as _os
+    import sys as _sys
+
+    if not _sys.platform.startswith("win"):
         raise
+    if hasattr(_os, "add_dll_directory"):
+        _os.add_dll_directory(_os.path.dirname(_os.path.abspath(__file__)))
+    from . import jsonlogic as _jsonlogic
+
+_apply = _jsonlogic.apply
+_apply_batch = _jsonlogic.apply_batch
+_apply_bytes = _jsonlogic.apply_bytes
+_compile_logic = _jsonlogic.compile
+
+
+# orjson is considerably faster than the stdlib json module, so use it for
+# the default (de)serialization when it's installed. Either way, the default
+# serializer produces bytes, which the extension accepts directly.
+#
+# The defaults are bound into the signatures of the functions below, so they
+# must be resolved at import time rather than on first use. The stdlib json
+# module is only imported when it is actually needed.
+if _orjson is not None:
+
+    def _dumps(
+        value,
+        _orjson_dumps=_orjson.dumps,
+        _option=_orjson.OPT_NON_STR_KEYS,
+        _error=_orjson.JSONEncodeError,
+    ):
+        # Like the json module, allow non-string dict keys such as ints
+        try:
+            return _orjson_dumps(value, option=_option)
+        except _error:
+            # orjson rejects some values that the json module accepts, such
+            # as integers outside of the 64-bit range
+            import json
+
+            return json.dumps(value).encode()
+
+    _loads = _orjson.loads
+else:
+    import json as _json
+
+    def _dumps(value):
+        return _json.dumps(value).encode()
+
+    _loads = _json.loads
+
+
+@_functools.lru_cache(maxsize=256)
+def _compile(value: bytes):
+    """Compile a serialized rule, reusing the result for repeated rules.
+
+    Rules are commonly applied over and over to different data, so keeping
+    the parsed rule around saves re-parsing it on every call.
+    """
+    return _compile_logic(value)
+
 
+# Types of values that are already serialized JSON
+_SERIALIZED = (bytes, bytearray, memoryview)
 
-def apply(value, data=None, serializer=None, deserializer=None):
-    """Run JSONLogic on a value and some data."""
-    serializer = serializer if serializer is not None else _json.dumps
-    deserializer = deserializer if deserializer is not None else _json.loads
-    res = _apply(serializer(value), serializer(data))
+# Serialized ``null``, used as the default data
+_NULL = b"null"
+
+
+def _serialize(serializer, value) -> bytes:
+    """Serialize a value to JSON bytes, passing serialized bytes through."""
+    if isinstance(value, _SERIALIZED):
+        return bytes(value)
+    serialized = serializer(value)
+    if isinstance(serialized, str):
+        return serialized.encode()
+    return serialized
+
+
+def apply(
+    value,
+    data=_NULL,
+    serializer=_dumps,
+    deserializer=_loads,
+    *,
+    decode=False,
+    _compile=_compile,
+    _serialize=_serialize,
+):
+    """Run JSONLogic on a value and some data.
+
+    Either the value or the data may be given as already serialized JSON
+    ``bytes``, ``bytearray`` or ``memoryview``, which will be used as-is.
+    Note that a ``str`` is always a JSON string, never serialized JSON: use
+    ``apply_serialized()`` for that.
+
+    The serializer may return ``str`` or ``bytes``. The result is passed to
+    the deserializer as UTF-8 encoded JSON bytes, which saves building an
+    intermediate ``str``. For a deserializer that only accepts ``str``, pass
+    ``decode=True``.
+    """
+    # The private keyword arguments are bound at definition time, so that
+    # looking them up is a local rather than a global access.
+    rule = _compile(_serialize(serializer, value))
+    res = rule.apply(_serialize(serializer, data))
+    return deserializer(res.decode() if decode else res)
+
+
+def apply_serialized(value, data=None, deserializer=_loads):
+    """Run JSONLogic on some already serialized value and optional data.
+
+    The value and data may be given as ``str`` or as UTF-8 encoded ``bytes``.
+    If either is ``bytes``, both are passed to Rust as bytes and the result is
+    passed to the deserializer as ``bytes``. Otherwise, it receives a ``str``.
+    """
+    if data is None:
+        data = "null"
+    if isinstance(value, str):
+        if isinstance(data, str):
+            return deserializer(_apply(value, data))
+        value = value.encode()
+    else:
+        value = bytes(value)
+    data = data.encode() if isinstance(data, str) else bytes(data)
+    return deserializer(_apply_bytes(value, data))
+
+
+def apply_bytes(value: bytes, data: bytes = b"null") -> bytes:
+    """Run JSONLogic on a serialized value and data, returning JSON bytes.
+
+    This skips conversion to and from ``str``, so it is the cheapest way to
+    evaluate rules when you already have (or want) UTF-8 encoded JSON.
+    """
+    return _apply_bytes(value, data)
+
+
+def apply_batch(
+    cases, serializer=_dumps, deserializer=_loads, *, _serialize=_serialize
+) -> list:
+    """Run JSONLogic on an iterable of ``(value, data)`` pairs.
+
+    All of the cases are evaluated in a single call into Rust, and a list of
+    their results is returned in the same order. The cases may also be given
+    as an already serialized JSON array of pairs, which will be used as-is.
+    """
+    if not isinstance(cases, _SERIALIZED):
+        cases = list(cases)
+    res = _apply_batch(_serialize(serializer, cases))
     return deserializer(res)
 
 
-def apply_serialized(value: str, data: str = None, deserializer=None):
-    """Run JSONLogic on some already serialized value and optional data."""
-    res = _apply(value, data if data is not None else "null")
+def apply_many(
+    value,
+    data,
+    serializer=_dumps,
+    deserializer=_loads,
+    *,
+    _compile=_compile,
+    _serialize=_serialize,
+) -> list:
+    """Run JSONLogic on a value for each item in an iterable of data.
+
+    The rule is parsed once, and all of the data is evaluated in a single call
+    into Rust. A list of the results is returned in the same order. As with
+    ``apply()``, the value may be given as serialized JSON bytes, and so may
+    the data, as a serialized JSON array.
+    """
+    if not isinstance(data, _SERIALIZED):
+        data = list(data)
+    rule = _compile(_serialize(serializer, value))
+    res = rule.apply_many(_serialize(serializer, data))
     return deserializer(res)
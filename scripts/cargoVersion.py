@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+"""Print the crate's version, as declared in Cargo.toml."""
+
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    import tomli as tomllib
+
+CARGO_TOML = Path(__file__).parent.parent / "Cargo.toml"
+
+
+if __name__ == "__main__":
+    with open(CARGO_TOML, "rb") as f:
+        print(tomllib.load(f)["package"]["version"])
@@ -1,7 +1,7 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-CURRENT_VERSION=$(cargo pkgid | tr '#' '\n' | tail -n 1 | tr ':' ' ' | awk '{print $2}')
+CURRENT_VERSION=$(python "$(dirname "$0")/cargoVersion.py")
 
 RESP=$(curl 'https://crates.io/api/v1/crates/jsonlogic-rs' -s \
     -H 'User-Agent: mplanchard_verison_check (msplanchard@gmail.com)' \
@@ -3,7 +3,7 @@ set -euo pipefail
 
 DIST_VERSION=$(npm view @bestow/jsonlogic-rs version)
 
-CURRENT_VERSION=$(cargo pkgid | tr ':' ' ' | awk '{print $3}')
+CURRENT_VERSION=$(python "$(dirname "$0")/cargoVersion.py")
 
 
 if [[ "${CURRENT_VERSION}" == "${DIST_VERSION}" ]]; then
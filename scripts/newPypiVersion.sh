@@ -3,7 +3,7 @@ set -euo pipefail
 
 DIST_VERSION=$(pip search jsonlogic-rs | grep -e '^jsonlogic-rs (' | awk '{print $2}' | sed 's/[\(\)]//g')
 
-CURRENT_VERSION=$(cargo pkgid | tr ':' ' ' | awk '{print $3}')
+CURRENT_VERSION=$(python "$(dirname "$0")/cargoVersion.py")
 
 if [[ "${CURRENT_VERSION}" == "${DIST_VERSION}" ]]; then
     echo false
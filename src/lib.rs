@@ -1,9 +1,12 @@
+use std::mem::ManuallyDrop;
+
 use serde_json;
 use serde_json::Value;
 
 mod error;
 // TODO consider whether this should be public; move doctests if so
 pub mod js_op;
+mod memo;
 mod op;
 mod value;
 
@@ -58,14 +61,110 @@ pub mod javascript_iface {
 
 #[cfg(feature = "python")]
 pub mod python_iface {
-    use cpython::exc::ValueError;
-    use cpython::{py_fn, py_module_initializer, PyErr, PyResult, Python};
+    use std::cell::RefCell;
+
+    use pyo3::exceptions::PyValueError;
+    use pyo3::prelude::*;
+    use pyo3::types::PyBytes;
+    use serde_json::Value;
 
-    py_module_initializer!(jsonlogic, initjsonlogic, PyInit_jsonlogic, |py, m| {
-        m.add(py, "__doc__", "Python bindings for json-logic-rs")?;
-        m.add(py, "apply", py_fn!(py, py_apply(value: &str, data: &str)))?;
+    use crate::Compiled;
+
+    /// Initial capacity of the scratch buffers
+    const SCRATCH_CAPACITY: usize = 4096;
+    /// Scratch buffers that grow beyond this size are not kept for reuse
+    const MAX_RETAINED_SCRATCH: usize = 1 << 20;
+
+    thread_local! {
+        /// Scratch space for input JSON, which simd-json parses in place.
+        static INPUT: RefCell<Vec<u8>> = RefCell::new(Vec::with_capacity(SCRATCH_CAPACITY));
+        /// Scratch space for serialized results, reused between calls so that
+        /// small results don't need a fresh allocation every time.
+        static OUTPUT: RefCell<Vec<u8>> = RefCell::new(Vec::with_capacity(SCRATCH_CAPACITY));
+    }
+
+    /// Parse JSON bytes, using SIMD instructions where they are available.
+    ///
+    /// simd-json mutates its input, so the bytes are first copied into the
+    /// thread's input buffer.
+    fn parse<T: serde::de::DeserializeOwned>(bytes: &[u8]) -> Result<T, String> {
+        INPUT.with(|input| {
+            let mut input = input.borrow_mut();
+            input.clear();
+            input.extend_from_slice(bytes);
+            let res = simd_json::serde::from_slice(&mut input[..])
+                .map_err(|err| format!("{}", err));
+            if input.capacity() > MAX_RETAINED_SCRATCH {
+                *input = Vec::with_capacity(SCRATCH_CAPACITY);
+            }
+            res
+        })
+    }
+
+    /// Serialize a result into the thread's output buffer, and copy it into
+    /// a new Python `bytes` object.
+    ///
+    /// The GIL is released while `write` runs, so it must not touch any
+    /// Python objects. Other Python threads may run in the meantime.
+    fn to_py_bytes<'py, F>(py: Python<'py>, write: F) -> PyResult<Bound<'py, PyBytes>>
+    where
+        F: FnOnce(&mut Vec<u8>) -> Result<(), String> + Send,
+    {
+        OUTPUT.with(|output| {
+            let mut output = output.borrow_mut();
+            output.clear();
+            let buf: &mut Vec<u8> = &mut output;
+            let res = py
+                .allow_threads(|| write(buf))
+                .map(|_| PyBytes::new_bound(py, &output[..]))
+                .map_err(PyValueError::new_err);
+            if output.capacity() > MAX_RETAINED_SCRATCH {
+                *output = Vec::with_capacity(SCRATCH_CAPACITY);
+            }
+            res
+        })
+    }
+
+    /// Python bindings for json-logic-rs
+    #[pymodule]
+    fn jsonlogic(m: &Bound<'_, PyModule>) -> PyResult<()> {
+        m.add_function(wrap_pyfunction!(py_apply, m)?)?;
+        m.add_function(wrap_pyfunction!(py_apply_bytes, m)?)?;
+        m.add_function(wrap_pyfunction!(py_apply_batch, m)?)?;
+        m.add_function(wrap_pyfunction!(py_compile, m)?)?;
+        m.add_class::<CompiledLogic>()?;
         Ok(())
-    });
+    }
+
+    /// A JSONLogic rule, parsed once so that it may be applied repeatedly.
+    #[pyclass(frozen, module = "jsonlogic_rs.jsonlogic")]
+    struct CompiledLogic {
+        rule: Compiled,
+    }
+
+    #[pymethods]
+    impl CompiledLogic {
+        /// Apply the rule to serialized data, returning the serialized result.
+        fn apply<'py>(
+            &self,
+            py: Python<'py>,
+            data: &Bound<'py, PyBytes>,
+        ) -> PyResult<Bound<'py, PyBytes>> {
+            let data = data.as_bytes();
+            to_py_bytes(py, |out| apply_compiled(&self.rule, data, out))
+        }
+
+        /// Apply the rule to each item of a serialized JSON array, returning
+        /// a serialized array of the results.
+        fn apply_many<'py>(
+            &self,
+            py: Python<'py>,
+            data: &Bound<'py, PyBytes>,
+        ) -> PyResult<Bound<'py, PyBytes>> {
+            let data = data.as_bytes();
+            to_py_bytes(py, |out| apply_compiled_many(&self.rule, data, out))
+        }
+    }
 
     fn apply(value: &str, data: &str) -> Result<String, String> {
         let value_json =
@@ -77,8 +176,118 @@ pub mod python_iface {
             .map(|res| res.to_string())
     }
 
-    fn py_apply(py: Python, value: &str, data: &str) -> PyResult<String> {
-        apply(value, data).map_err(|err| PyErr::new::<ValueError, _>(py, err))
+    #[pyfunction]
+    #[pyo3(name = "apply")]
+    fn py_apply(py: Python<'_>, value: &str, data: &str) -> PyResult<String> {
+        py.allow_threads(|| apply(value, data))
+            .map_err(PyValueError::new_err)
+    }
+
+    /// Like `apply()`, but reading and writing UTF-8 JSON bytes, so that
+    /// no Python `str` needs to be constructed on either side of the call.
+    fn apply_bytes(value: &[u8], data: &[u8], out: &mut Vec<u8>) -> Result<(), String> {
+        let value_json = parse(value)?;
+        let data_json = parse(data)?;
+
+        crate::apply(&value_json, &data_json)
+            .map_err(|err| format!("{}", err))
+            .and_then(|res| {
+                serde_json::to_writer(out, &res).map_err(|err| format!("{}", err))
+            })
+    }
+
+    #[pyfunction]
+    #[pyo3(name = "apply_bytes")]
+    fn py_apply_bytes<'py>(
+        py: Python<'py>,
+        value: &Bound<'py, PyBytes>,
+        data: &Bound<'py, PyBytes>,
+    ) -> PyResult<Bound<'py, PyBytes>> {
+        let (value, data) = (value.as_bytes(), data.as_bytes());
+        to_py_bytes(py, |out| apply_bytes(value, data, out))
+    }
+
+    /// Apply a JSON array of `[rule, data]` pairs, returning a JSON array of
+    /// their results.
+    fn apply_batch(cases: &[u8], out: &mut Vec<u8>) -> Result<(), String> {
+        let cases: Vec<(Value, Value)> = parse(cases)?;
+
+        out.push(b'[');
+        for (idx, (value, data)) in cases.iter().enumerate() {
+            if idx > 0 {
+                out.push(b',');
+            }
+            let res = crate::apply(value, data)
+                .map_err(|err| format!("Case {} failed: {}", idx, err))?;
+            serde_json::to_writer(&mut *out, &res).map_err(|err| format!("{}", err))?;
+        }
+        out.push(b']');
+        Ok(())
+    }
+
+    #[pyfunction]
+    #[pyo3(name = "apply_batch")]
+    fn py_apply_batch<'py>(
+        py: Python<'py>,
+        cases: &Bound<'py, PyBytes>,
+    ) -> PyResult<Bound<'py, PyBytes>> {
+        let cases = cases.as_bytes();
+        to_py_bytes(py, |out| apply_batch(cases, out))
+    }
+
+    /// Parse a serialized rule once, so it may be applied repeatedly.
+    fn compile(value: &[u8]) -> Result<Compiled, String> {
+        let value_json = parse(value)?;
+        Compiled::new(value_json).map_err(|err| format!("{}", err))
+    }
+
+    fn apply_compiled(
+        rule: &Compiled,
+        data: &[u8],
+        out: &mut Vec<u8>,
+    ) -> Result<(), String> {
+        let data_json = parse(data)?;
+
+        rule.apply(&data_json)
+            .map_err(|err| format!("{}", err))
+            .and_then(|res| {
+                serde_json::to_writer(out, &res).map_err(|err| format!("{}", err))
+            })
+    }
+
+    /// Apply a rule to each item of a JSON array of data, returning a JSON
+    /// array of their results.
+    fn apply_compiled_many(
+        rule: &Compiled,
+        data: &[u8],
+        out: &mut Vec<u8>,
+    ) -> Result<(), String> {
+        let data: Vec<Value> = parse(data)?;
+
+        out.push(b'[');
+        for (idx, item) in data.iter().enumerate() {
+            if idx > 0 {
+                out.push(b',');
+            }
+            let res = rule
+                .apply(item)
+                .map_err(|err| format!("Item {} failed: {}", idx, err))?;
+            serde_json::to_writer(&mut *out, &res).map_err(|err| format!("{}", err))?;
+        }
+        out.push(b']');
+        Ok(())
+    }
+
+    #[pyfunction]
+    #[pyo3(name = "compile")]
+    fn py_compile(
+        py: Python<'_>,
+        value: &Bound<'_, PyBytes>,
+    ) -> PyResult<CompiledLogic> {
+        let value = value.as_bytes();
+        py.allow_threads(|| compile(value))
+            .map(|rule| CompiledLogic { rule })
+            .map_err(PyValueError::new_err)
     }
 }
 
@@ -86,9 +295,76 @@ pub mod python_iface {
 ///
 pub fn apply(value: &Value, data: &Value) -> Result<Value, Error> {
     let parsed = Parsed::from_value(&value)?;
+    let _scope = memo::Scope::enter(data);
     parsed.evaluate(data).map(Value::from)
 }
 
+/// A JSONLogic rule that has been parsed ahead of time.
+///
+/// `apply()` parses its rule on every call. When the same rule is going to be
+/// run against many pieces of data, compiling it once avoids repeating that
+/// work.
+///
+/// ```rust
+/// use jsonlogic_rs::Compiled;
+/// use serde_json::json;
+///
+/// let rule = Compiled::new(json!({"===": [{"var": "a"}, 7]})).unwrap();
+/// assert_eq!(rule.apply(&json!({"a": 7})).unwrap(), json!(true));
+/// assert_eq!(rule.apply(&json!({"a": 8})).unwrap(), json!(false));
+/// ```
+#[derive(Debug)]
+pub struct Compiled {
+    // `parsed` borrows from `value`, so it must be dropped first. Fields are
+    // dropped in declaration order, but `value` is a raw pointer that `Drop`
+    // frees itself, so `parsed` is dropped explicitly there before it. Its
+    // `'static` lifetime is never exposed outside of this struct.
+    parsed: ManuallyDrop<Parsed<'static>>,
+    value: *mut Value,
+}
+impl Compiled {
+    /// Parse a JSONLogic rule for later evaluation.
+    pub fn new(value: Value) -> Result<Self, Error> {
+        // The value is leaked into a raw pointer rather than kept in a `Box`,
+        // since moving a `Box` would invalidate the references `parsed`
+        // holds into it. It is never mutated, and it is only freed in
+        // `drop()`, after `parsed`, so the references remain valid for the
+        // lifetime of the struct.
+        let value = Box::into_raw(Box::new(value));
+        let static_value: &'static Value = unsafe { &*value };
+        match Parsed::from_value(static_value) {
+            Ok(parsed) => Ok(Self {
+                parsed: ManuallyDrop::new(parsed),
+                value,
+            }),
+            Err(err) => {
+                drop(unsafe { Box::from_raw(value) });
+                Err(err)
+            }
+        }
+    }
+
+    /// Run the compiled rule against the given data.
+    pub fn apply(&self, data: &Value) -> Result<Value, Error> {
+        // Shorten the parsed rule's lifetime to that of the borrow of self
+        let parsed: &Parsed = &self.parsed;
+        let _scope = memo::Scope::enter(data);
+        parsed.evaluate(data).map(Value::from)
+    }
+}
+impl Drop for Compiled {
+    fn drop(&mut self) {
+        unsafe {
+            ManuallyDrop::drop(&mut self.parsed);
+            drop(Box::from_raw(self.value));
+        }
+    }
+}
+// The raw pointer is owned uniquely, exactly like a `Box`, and only ever read
+// through shared references.
+unsafe impl Send for Compiled {}
+unsafe impl Sync for Compiled {}
+
 #[cfg(test)]
 mod jsonlogic_tests {
     use super::*;
@@ -1093,6 +1369,33 @@ mod jsonlogic_tests {
         ]
     }
 
+    fn repeated_subexpression_cases() -> Vec<(Value, Value, Result<Value, ()>)> {
+        vec![
+            // The same sub-expression against the same data
+            (
+                json!({"==": [{"var": "a"}, {"var": "a"}]}),
+                json!({"a": 1}),
+                Ok(json!(true)),
+            ),
+            (
+                json!({"if": [{"var": "a"}, {"+": [{"var": "a"}, 1]}, {"var": "a"}]}),
+                json!({"a": 1}),
+                Ok(json!(2)),
+            ),
+            // The same sub-expression against different data
+            (
+                json!({"map": [{"var": "a"}, {"+": [{"var": ""}, {"var": ""}]}]}),
+                json!({"a": [1, 2]}),
+                Ok(json!([2, 4])),
+            ),
+            (
+                json!({"merge": [{"var": ""}, {"map": [{"var": ""}, {"var": ""}]}]}),
+                json!([1, 2]),
+                Ok(json!([1, 2, 1, 2])),
+            ),
+        ]
+    }
+
     fn in_cases() -> Vec<(Value, Value, Result<Value, ()>)> {
         vec![
             // Invalid inputs
@@ -1152,10 +1455,15 @@ mod jsonlogic_tests {
         let result = apply(&op, &data);
         println!("- Result: {:?}", result);
         println!("- Expected: {:?}", exp);
+        // Compiled rules must behave the same as those applied directly
+        let compiled_result = Compiled::new(op).and_then(|rule| rule.apply(&data));
         if exp.is_ok() {
-            assert_eq!(result.unwrap(), exp.unwrap());
+            let exp = exp.unwrap();
+            assert_eq!(result.unwrap(), exp);
+            assert_eq!(compiled_result.unwrap(), exp);
         } else {
             result.unwrap_err();
+            compiled_result.unwrap_err();
         }
     }
 
@@ -1400,4 +1708,11 @@ mod jsonlogic_tests {
     fn test_in_op() {
         in_cases().into_iter().for_each(assert_jsonlogic)
     }
+
+    #[test]
+    fn test_repeated_subexpressions() {
+        repeated_subexpression_cases()
+            .into_iter()
+            .for_each(assert_jsonlogic)
+    }
 }
@@ -0,0 +1,376 @@
+//! Sub-expression Memoization
+//!
+//! With the `memoize` feature enabled, the result of every operation evaluated
+//! against the top-level data of an `apply()` call is cached for the rest of
+//! that call. Rules that repeat a sub-expression (e.g. the same `var` lookup or
+//! `map` as several arguments of an operation) then only evaluate it once.
+//!
+//! Each operation gets a `Key` when the rule is parsed: a structural hash of
+//! its subtree, built from the keys of its arguments, so that identical
+//! sub-expressions get identical keys. Cache hits are checked against the
+//! cached rule itself, so hash collisions can't return the wrong result.
+//!
+//! Only operations in the rule's parsed tree are cached. Lazy operations
+//! (e.g. `if` and `and`) re-parse their arguments whenever they are
+//! evaluated, and those temporary operations are neither hashed nor cached:
+//! they don't live as long as the cache. Operations evaluated against other
+//! data (e.g. the items in a `map`) are not cached either, nor are any
+//! containing the impure `log` operator.
+//!
+//! Without the feature, this module does nothing.
+
+#[cfg(feature = "memoize")]
+pub use self::enabled::{cached, Key, Scope};
+
+#[cfg(not(feature = "memoize"))]
+pub use self::disabled::{cached, Key, Scope};
+
+#[cfg(feature = "memoize")]
+mod enabled {
+    use std::cell::RefCell;
+    use std::collections::hash_map::DefaultHasher;
+    use std::collections::HashMap;
+    use std::hash::{Hash, Hasher};
+
+    use serde_json::Value;
+
+    use crate::error::Error;
+
+    /// The structural key of a parsed value, computed once at parse time.
+    #[derive(Clone, Copy, Debug)]
+    pub struct Key {
+        hash: u64,
+        /// Whether the value is part of a rule's parsed tree, and free of
+        /// impure (`log`) operations
+        cacheable: bool,
+    }
+    impl Key {
+        /// The key of anything parsed while a rule is being evaluated.
+        const TEMPORARY: Self = Self {
+            hash: 0,
+            cacheable: false,
+        };
+
+        /// The key of a raw JSON value.
+        pub fn raw(value: &Value) -> Self {
+            if evaluating() {
+                return Self::TEMPORARY;
+            }
+            let mut hasher = DefaultHasher::new();
+            let pure = hash_value(value, &mut hasher);
+            Self {
+                hash: hasher.finish(),
+                cacheable: pure,
+            }
+        }
+
+        /// The key of an operation, given its symbol and its arguments' keys.
+        pub fn operation<I>(symbol: &str, arguments: I) -> Self
+        where
+            I: IntoIterator<Item = Key>,
+        {
+            if evaluating() {
+                return Self::TEMPORARY;
+            }
+            let mut hasher = DefaultHasher::new();
+            symbol.hash(&mut hasher);
+            let mut cacheable = symbol != "log";
+            for arg in arguments {
+                arg.hash.hash(&mut hasher);
+                cacheable &= arg.cacheable;
+            }
+            Self {
+                hash: hasher.finish(),
+                cacheable,
+            }
+        }
+    }
+
+    /// Feed a value into a hasher, returning whether it is free of anything
+    /// that looks like a `log` operation.
+    fn hash_value<H: Hasher>(value: &Value, hasher: &mut H) -> bool {
+        match value {
+            Value::Null => {
+                0u8.hash(hasher);
+                true
+            }
+            Value::Bool(b) => {
+                1u8.hash(hasher);
+                b.hash(hasher);
+                true
+            }
+            Value::Number(n) => {
+                2u8.hash(hasher);
+                match (n.as_u64(), n.as_i64()) {
+                    (Some(u), _) => u.hash(hasher),
+                    (_, Some(i)) => i.hash(hasher),
+                    _ => n.as_f64().map(f64::to_bits).hash(hasher),
+                }
+                true
+            }
+            Value::String(s) => {
+                3u8.hash(hasher);
+                s.hash(hasher);
+                true
+            }
+            Value::Array(items) => {
+                4u8.hash(hasher);
+                items.len().hash(hasher);
+                items
+                    .iter()
+                    .fold(true, |pure, item| hash_value(item, hasher) && pure)
+            }
+            Value::Object(obj) => {
+                5u8.hash(hasher);
+                obj.len().hash(hasher);
+                let pure = !(obj.len() == 1 && obj.contains_key("log"));
+                obj.iter().fold(pure, |pure, (key, item)| {
+                    key.hash(hasher);
+                    hash_value(item, hasher) && pure
+                })
+            }
+        }
+    }
+
+    struct Cache {
+        data: *const Value,
+        results: HashMap<u64, (*const Value, Value)>,
+    }
+
+    thread_local! {
+        static CACHE: RefCell<Option<Cache>> = RefCell::new(None);
+    }
+
+    /// Whether a rule is being evaluated on this thread. Anything parsed in
+    /// the meantime is a temporary, which may not outlive the cache.
+    fn evaluating() -> bool {
+        CACHE.with(|c| c.borrow().is_some())
+    }
+
+    #[cfg(test)]
+    thread_local! {
+        static HITS: std::cell::Cell<usize> = std::cell::Cell::new(0);
+    }
+
+    /// The number of cache hits on this thread so far.
+    #[cfg(test)]
+    pub fn hits() -> usize {
+        HITS.with(|h| h.get())
+    }
+
+    /// A memoization scope, covering the evaluation of a single rule.
+    ///
+    /// The cache is cleared when the scope is dropped. The rule being
+    /// evaluated must be parsed before entering the scope, and must outlive
+    /// it.
+    pub struct Scope {
+        previous: Option<Cache>,
+    }
+    impl Scope {
+        pub fn enter(data: &Value) -> Self {
+            let cache = Cache {
+                data,
+                results: HashMap::new(),
+            };
+            Self {
+                previous: CACHE.with(|c| c.replace(Some(cache))),
+            }
+        }
+    }
+    impl Drop for Scope {
+        fn drop(&mut self) {
+            let previous = self.previous.take();
+            CACHE.with(|c| c.replace(previous));
+        }
+    }
+
+    /// Evaluate a rule, or return its result from an earlier evaluation.
+    pub fn cached<F>(
+        key: Key,
+        rule: &Value,
+        data: &Value,
+        evaluate: F,
+    ) -> Result<Value, Error>
+    where
+        F: FnOnce() -> Result<Value, Error>,
+    {
+        if !key.cacheable {
+            return evaluate();
+        }
+        let hit = CACHE.with(|c| match &*c.borrow() {
+            Some(cache) if std::ptr::eq(cache.data, data) => {
+                match cache.results.get(&key.hash) {
+                    // Only keys parsed before the scope was entered are
+                    // cacheable, and that rule outlives the scope, so the
+                    // cached rule is still valid here.
+                    Some((cached, result))
+                        if std::ptr::eq(*cached, rule)
+                            || unsafe { &**cached } == rule =>
+                    {
+                        Some(Some(result.clone()))
+                    }
+                    // A hash collision; just evaluate without caching
+                    Some(_) => None,
+                    None => Some(None),
+                }
+            }
+            _ => None,
+        });
+        let cacheable = match hit {
+            Some(Some(result)) => {
+                #[cfg(test)]
+                HITS.with(|h| h.set(h.get() + 1));
+                return Ok(result);
+            }
+            Some(None) => true,
+            None => false,
+        };
+
+        // The cache must not be borrowed here, since evaluation recurses.
+        let result = evaluate()?;
+        if cacheable {
+            CACHE.with(|c| {
+                if let Some(cache) = c.borrow_mut().as_mut() {
+                    cache.results.insert(key.hash, (rule, result.clone()));
+                }
+            });
+        }
+        Ok(result)
+    }
+
+    #[cfg(test)]
+    mod tests {
+        use super::*;
+        use serde_json::json;
+
+        /// Apply a rule, returning its result and the number of cache hits.
+        fn apply_counting_hits(rule: Value, data: Value) -> (Value, usize) {
+            let before = hits();
+            let result = crate::apply(&rule, &data).unwrap();
+            (result, hits() - before)
+        }
+
+        #[test]
+        fn test_repeated_subexpression_evaluated_once() {
+            let sub = json!({"*": [{"var": "a"}, 2]});
+            let (result, hits) =
+                apply_counting_hits(json!({"+": [sub, sub]}), json!({"a": 3}));
+            assert_eq!(result, json!(12));
+            // The second `*` is a hit, so its `var` is never evaluated
+            assert_eq!(hits, 1);
+        }
+
+        #[test]
+        fn test_repeated_lazy_subexpression_evaluated_once() {
+            let sub = json!({"if": [{"var": "a"}, "yes", "no"]});
+            let (result, hits) = apply_counting_hits(
+                json!({"cat": [sub, sub, sub]}),
+                json!({"a": true}),
+            );
+            assert_eq!(result, json!("yesyesyes"));
+            assert_eq!(hits, 2);
+        }
+
+        #[test]
+        fn test_distinct_subexpressions_not_shared() {
+            let (result, hits) = apply_counting_hits(
+                json!({"+": [{"var": "a"}, {"var": "b"}]}),
+                json!({"a": 1, "b": 2}),
+            );
+            assert_eq!(result, json!(3));
+            assert_eq!(hits, 0);
+        }
+
+        #[test]
+        fn test_impure_subexpressions_not_cached() {
+            let sub = json!({"+": [{"log": 1}, 1]});
+            let (result, hits) =
+                apply_counting_hits(json!({"+": [sub, sub]}), json!(null));
+            assert_eq!(result, json!(4));
+            assert_eq!(hits, 0);
+
+            let sub = json!({"if": [true, {"log": 1}, 0]});
+            let (_, hits) = apply_counting_hits(json!({"+": [sub, sub]}), json!(null));
+            assert_eq!(hits, 0);
+        }
+
+        #[test]
+        fn test_lazy_operations_nested_in_lazy_operations() {
+            // The inner `var` is parsed (and freed) by `or` during
+            // evaluation, so it must not be cached, nor compared against
+            // when the outer `var` is evaluated.
+            let (result, hits) = apply_counting_hits(
+                json!({"and": [{"or": [{"var": "a"}, false]}, {"var": "a"}]}),
+                json!({"a": 1}),
+            );
+            assert_eq!(result, json!(1));
+            assert_eq!(hits, 0);
+
+            let sub = json!({"if": [{"some": [{"var": "a"}, {"==": [{"var": ""}, 1]}]}, 1, 0]});
+            let (result, hits) = apply_counting_hits(
+                json!({"+": [sub, {"if": [true, sub, 0]}, sub]}),
+                json!({"a": [1, 2]}),
+            );
+            assert_eq!(result, json!(3));
+            assert_eq!(hits, 1);
+        }
+
+        #[test]
+        fn test_keys_not_computed_while_evaluating() {
+            let _scope = Scope::enter(&Value::Null);
+            assert!(!Key::raw(&json!(1)).cacheable);
+            assert!(!Key::operation("+", vec![]).cacheable);
+        }
+
+        #[test]
+        fn test_equal_numbers_share_keys() {
+            assert_eq!(Key::raw(&json!(1)).hash, Key::raw(&json!(1)).hash);
+            assert_ne!(Key::raw(&json!(1)).hash, Key::raw(&json!("1")).hash);
+        }
+    }
+}
+
+#[cfg(not(feature = "memoize"))]
+mod disabled {
+    use serde_json::Value;
+
+    use crate::error::Error;
+
+    #[derive(Clone, Copy, Debug)]
+    pub struct Key;
+    impl Key {
+        #[inline]
+        pub fn raw(_value: &Value) -> Self {
+            Self
+        }
+
+        #[inline]
+        pub fn operation<I>(_symbol: &str, _arguments: I) -> Self
+        where
+            I: IntoIterator<Item = Key>,
+        {
+            Self
+        }
+    }
+
+    pub struct Scope;
+    impl Scope {
+        #[inline]
+        pub fn enter(_data: &Value) -> Self {
+            Self
+        }
+    }
+
+    #[inline]
+    pub fn cached<F>(
+        _key: Key,
+        _rule: &Value,
+        _data: &Value,
+        evaluate: F,
+    ) -> Result<Value, Error>
+    where
+        F: FnOnce() -> Result<Value, Error>,
+    {
+        evaluate()
+    }
+}
@@ -14,6 +14,7 @@ use serde_json::{Map, Value};
 use std::fmt;
 
 use crate::error::Error;
+use crate::memo;
 use crate::value::to_number_value;
 use crate::value::{Evaluated, Parsed};
 use crate::{js_op, Parser};
@@ -362,14 +363,23 @@ type DataOperatorFn = fn(&Value, &Vec<&Value>) -> Result<Value, Error>;
 pub struct LazyOperation<'a> {
     operator: &'a LazyOperator,
     arguments: Vec<Value>,
+    source: &'a Value,
+    key: memo::Key,
 }
 impl<'a> Parser<'a> for LazyOperation<'a> {
     fn from_value(value: &'a Value) -> Result<Option<Self>, Error> {
         op_from_map(&LAZY_OPERATOR_MAP, value).and_then(|opt| {
             opt.map(|op| {
+                let arguments: Vec<Value> =
+                    op.args.into_iter().map(|v| v.clone()).collect();
                 Ok(LazyOperation {
                     operator: op.op,
-                    arguments: op.args.into_iter().map(|v| v.clone()).collect(),
+                    key: memo::Key::operation(
+                        op.op.symbol,
+                        arguments.iter().map(memo::Key::raw),
+                    ),
+                    arguments,
+                    source: value,
                 })
             })
             .transpose()
@@ -377,9 +387,17 @@ impl<'a> Parser<'a> for LazyOperation<'a> {
     }
 
     fn evaluate(&self, data: &'a Value) -> Result<Evaluated, Error> {
-        self.operator
-            .execute(data, &self.arguments.iter().collect())
-            .map(Evaluated::New)
+        memo::cached(self.key, self.source, data, || {
+            self.operator
+                .execute(data, &self.arguments.iter().collect())
+        })
+        .map(Evaluated::New)
+    }
+}
+
+impl LazyOperation<'_> {
+    pub fn memo_key(&self) -> memo::Key {
+        self.key
     }
 }
 
@@ -398,14 +416,22 @@ impl From<LazyOperation<'_>> for Value {
 pub struct Operation<'a> {
     operator: &'a Operator,
     arguments: Vec<Parsed<'a>>,
+    source: &'a Value,
+    key: memo::Key,
 }
 impl<'a> Parser<'a> for Operation<'a> {
     fn from_value(value: &'a Value) -> Result<Option<Self>, Error> {
         op_from_map(&OPERATOR_MAP, value).and_then(|opt| {
             opt.map(|op| {
+                let arguments = Parsed::from_values(op.args)?;
                 Ok(Operation {
                     operator: op.op,
-                    arguments: Parsed::from_values(op.args)?,
+                    key: memo::Key::operation(
+                        op.op.symbol,
+                        arguments.iter().map(Parsed::memo_key),
+                    ),
+                    arguments,
+                    source: value,
                 })
             })
             .transpose()
@@ -414,14 +440,21 @@ impl<'a> Parser<'a> for Operation<'a> {
 
     /// Evaluate the operation after recursively evaluating any nested operations
     fn evaluate(&self, data: &'a Value) -> Result<Evaluated, Error> {
-        let arguments = self
-            .arguments
-            .iter()
-            .map(|value| value.evaluate(data).map(Value::from))
-            .collect::<Result<Vec<Value>, Error>>()?;
-        self.operator
-            .execute(&arguments.iter().collect())
-            .map(Evaluated::New)
+        memo::cached(self.key, self.source, data, || {
+            let arguments = self
+                .arguments
+                .iter()
+                .map(|value| value.evaluate(data).map(Value::from))
+                .collect::<Result<Vec<Value>, Error>>()?;
+            self.operator.execute(&arguments.iter().collect())
+        })
+        .map(Evaluated::New)
+    }
+}
+
+impl Operation<'_> {
+    pub fn memo_key(&self) -> memo::Key {
+        self.key
     }
 }
 
@@ -442,14 +475,22 @@ impl From<Operation<'_>> for Value {
 pub struct DataOperation<'a> {
     operator: &'a DataOperator,
     arguments: Vec<Parsed<'a>>,
+    source: &'a Value,
+    key: memo::Key,
 }
 impl<'a> Parser<'a> for DataOperation<'a> {
     fn from_value(value: &'a Value) -> Result<Option<Self>, Error> {
         op_from_map(&DATA_OPERATOR_MAP, value).and_then(|opt| {
             opt.map(|op| {
+                let arguments = Parsed::from_values(op.args)?;
                 Ok(DataOperation {
                     operator: op.op,
-                    arguments: Parsed::from_values(op.args)?,
+                    key: memo::Key::operation(
+                        op.op.symbol,
+                        arguments.iter().map(Parsed::memo_key),
+                    ),
+                    arguments,
+                    source: value,
                 })
             })
             .transpose()
@@ -458,14 +499,20 @@ impl<'a> Parser<'a> for DataOperation<'a> {
 
     /// Evaluate the operation after recursively evaluating any nested operations
     fn evaluate(&self, data: &'a Value) -> Result<Evaluated, Error> {
-        let arguments = self
-            .arguments
-            .iter()
-            .map(|value| value.evaluate(data).map(Value::from))
-            .collect::<Result<Vec<Value>, Error>>()?;
-        self.operator
-            .execute(data, &arguments.iter().collect())
-            .map(Evaluated::New)
+        memo::cached(self.key, self.source, data, || {
+            let arguments = self
+                .arguments
+                .iter()
+                .map(|value| value.evaluate(data).map(Value::from))
+                .collect::<Result<Vec<Value>, Error>>()?;
+            self.operator.execute(data, &arguments.iter().collect())
+        })
+        .map(Evaluated::New)
+    }
+}
+impl DataOperation<'_> {
+    pub fn memo_key(&self) -> memo::Key {
+        self.key
     }
 }
 impl From<DataOperation<'_>> for Value {
@@ -1,6 +1,7 @@
 use serde_json::{Number, Value};
 
 use crate::error::Error;
+use crate::memo;
 use crate::op::{DataOperation, LazyOperation, Operation};
 use crate::Parser;
 
@@ -39,6 +40,16 @@ impl<'a> Parsed<'a> {
             .collect::<Result<Vec<Self>, Error>>()
     }
 
+    /// The key under which evaluations of the value are memoized
+    pub fn memo_key(&self) -> memo::Key {
+        match self {
+            Self::Operation(op) => op.memo_key(),
+            Self::LazyOperation(op) => op.memo_key(),
+            Self::DataOperation(op) => op.memo_key(),
+            Self::Raw(raw) => memo::Key::raw(raw.value),
+        }
+    }
+
     pub fn evaluate(&self, data: &'a Value) -> Result<Evaluated, Error> {
         match self {
             Self::Operation(op) => op.evaluate(data),
@@ -78,3 +78,16 @@ fn run_cases() {
         )
     })
 }
+
+#[test]
+fn run_cases_compiled() {
+    let cases = load_tests();
+    cases.into_iter().for_each(|case| {
+        println!("Running compiled case");
+        println!("  logic: {:?}", case.logic);
+        println!("  data: {:?}", case.data);
+        println!("  expected: {:?}", case.result);
+        let rule = jsonlogic_rs::Compiled::new(case.logic).unwrap();
+        assert_eq!(rule.apply(&case.data).unwrap(), case.result)
+    })
+}
@@ -1,10 +1,22 @@
 """Test the python distribution."""
 
 import json
+import sys
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+if __name__ == "__main__" and "--without-orjson" in sys.argv:
+    # Make `import orjson` fail, so the stdlib json fallback is tested
+    sys.modules["orjson"] = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import jsonlogic_rs
+from jsonlogic_rs.jsonlogic import compile as compile_logic
 
 
 TEST_FILE = Path(__file__).parent / "data/tests.json"
@@ -22,17 +34,101 @@ class TestCase(t.NamedTuple):
 
 def load_tests() -> t.List[TestCase]:
     """Load the test json into a series of cases."""
-    with open(TEST_FILE) as f:
-        raw_cases = filter(lambda case: not isinstance(case, str), json.load(f))
-        return list(map(lambda case: TestCase(*case), raw_cases))
+    with open(TEST_FILE, "rb") as f:
+        raw = f.read()
+    raw_cases = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    # String entries are comments separating groups of cases
+    return [TestCase(*case) for case in raw_cases if not isinstance(case, str)]
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value).encode()
 
 
 def run_tests() -> None:
     """Run through the tests and assert we get the right output."""
-    for idx, case in enumerate(load_tests()):
+    cases = load_tests()
+    for idx, case in enumerate(cases):
         result = jsonlogic_rs.apply(case.logic, case.data)
         assert result == case.exp, f"Failed test case {idx}: {case}"
+        serialized = jsonlogic_rs.apply_bytes(
+            json.dumps(case.logic).encode(), json.dumps(case.data).encode()
+        )
+        assert json.loads(serialized) == case.exp, f"Failed bytes case {idx}"
+        result = jsonlogic_rs.apply_serialized(
+            _dumps(case.logic), _dumps(case.data)
+        )
+        assert result == case.exp, f"Failed serialized bytes case {idx}"
+        # Running the same rule again should give the same result when
+        # using the already-compiled rule
+        result = jsonlogic_rs.apply(case.logic, case.data)
+        assert result == case.exp, f"Failed compiled case {idx}: {case}"
+        result = jsonlogic_rs.apply(
+            _dumps(case.logic), _dumps(case.data)
+        )
+        assert result == case.exp, f"Failed pre-serialized case {idx}: {case}"
+        result = jsonlogic_rs.apply(
+            case.logic, case.data, json.dumps, json.loads, decode=True
+        )
+        assert result == case.exp, f"Failed str case {idx}: {case}"
+        results = jsonlogic_rs.apply_many(case.logic, [case.data, case.data])
+        assert results == [case.exp] * 2, f"Failed many case {idx}: {case}"
+        results = jsonlogic_rs.apply_many(
+            _dumps(case.logic), _dumps([case.data, case.data])
+        )
+        assert results == [case.exp] * 2, f"Failed serialized many {idx}"
+
+    # Integers too large for 64 bits are parsed as floats, whether they're
+    # passed to Rust as str or as bytes
+    rule, data = '{"var": "a"}', '{"a": 100000000000000000000}'
+    assert jsonlogic_rs.apply_serialized(rule, data) == 1e20
+    res = jsonlogic_rs.apply_bytes(rule.encode(), data.encode())
+    assert json.loads(res) == 1e20
+
+    # Subclasses of str are accepted as serialized JSON
+    class Rule(str):
+        pass
+
+    assert jsonlogic_rs.apply_serialized(Rule('{"==": [1, 1]}')) is True
+    assert jsonlogic_rs.apply_serialized(Rule('{"==": [1, 1]}'), b"1") is True
+
+    # Non-string keys are serialized as strings, as with the json module
+    assert jsonlogic_rs.apply({"var": "1"}, {1: "a"}) == "a"
+    # Integers outside of the 64-bit range can be serialized either way
+    assert jsonlogic_rs.apply({"var": "a"}, {"a": 2**70}) == float(2**70)
+
+    results = jsonlogic_rs.apply_batch((c.logic, c.data) for c in cases)
+    assert len(results) == len(cases)
+    for idx, (case, result) in enumerate(zip(cases, results)):
+        assert result == case.exp, f"Failed batch case {idx}: {case}"
+    serialized = _dumps([(c.logic, c.data) for c in cases])
+    assert jsonlogic_rs.apply_batch(serialized) == results
+
+
+def run_threaded_tests() -> None:
+    """Apply one compiled rule from several threads at once.
+
+    The GIL is released while rules are evaluated, so this runs them in
+    parallel, each thread with its own scratch buffers.
+    """
+    logic = {"+": [{"var": "a"}, 1]}
+    rule = compile_logic(_dumps(logic))
+
+    def check(n: int) -> int:
+        assert json.loads(rule.apply(_dumps({"a": n}))) == n + 1
+        data = [{"a": i} for i in range(n)]
+        expected = list(range(1, n + 1))
+        assert json.loads(rule.apply_many(_dumps(data))) == expected
+        assert jsonlogic_rs.apply(logic, {"a": n}) == n + 1
+        assert jsonlogic_rs.apply_many(logic, data) == expected
+        return n
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(check, range(500))) == list(range(500))
 
 
 if __name__ == "__main__":
+    if "--without-orjson" in sys.argv:
+        assert jsonlogic_rs._orjson is None
     run_tests()
+    run_threaded_tests()
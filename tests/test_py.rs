@@ -1,6 +1,6 @@
 //! Tests for the python bindings
 //!
-//! Note that Python 3.6+ must be installed for these tests to work.
+//! Note that Python 3.7+ must be installed for these tests to work.
 //!
 //! The actual tests are found in `test_py.py`. This file just serves
 //! as a runner.